@@ -1,16 +1,29 @@
 import sys
 import os
 import random
+import itertools
+import shutil
+import subprocess
+import tempfile
+from collections import OrderedDict
 from pathlib import Path
 
-from PySide6.QtCore import Qt, QUrl, Slot, QTimer
-from PySide6.QtGui import QAction, QKeySequence, QPainter, QColor, QPixmap, QIcon
+from PySide6.QtCore import (
+    Qt, QUrl, QRect, Slot, Signal, QTimer, QObject, QThread, QElapsedTimer,
+    QRunnable, QThreadPool, QPersistentModelIndex
+)
+from PySide6.QtGui import QAction, QKeySequence, QPainter, QColor, QPixmap, QIcon, QRegion
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
     QFileDialog, QSlider, QLabel, QStyle, QMenuBar, QListWidget,
     QListWidgetItem, QMessageBox, QAbstractItemView, QCheckBox, QFrame, QSizePolicy
 )
-from PySide6.QtMultimedia import QAudioOutput, QMediaPlayer
+from PySide6.QtMultimedia import QAudioOutput, QMediaPlayer, QAudioBuffer, QAudioFormat
+# Qt 6.8+: spelarens avkodade PCM kan tappas av direkt (ingen extra avkodning för EQ:n)
+try:
+    from PySide6.QtMultimedia import QAudioBufferOutput
+except ImportError:
+    QAudioBufferOutput = None
 
 # (valfritt) mutagen för längd/metadata
 try:
@@ -20,11 +33,61 @@ except Exception:
 
 # ---- Spektrumanalys (kräver ffmpeg installerat) ----
 import numpy as np
+FfmpegPath = shutil.which("ffmpeg")
+# pydub används bara som reserv om ffmpeg inte hittas i PATH
 try:
     from pydub import AudioSegment
     PydubAvailable = True
 except Exception:
     PydubAvailable = False
+# (valfritt) scipy för float32-FFT
+try:
+    from scipy.fft import rfft
+    ScipyAvailable = True
+except Exception:
+    ScipyAvailable = False
+# (valfritt) numba för bandreduktionen
+try:
+    from numba import njit
+    NumbaAvailable = True
+except Exception:
+    NumbaAvailable = False
+
+if NumbaAvailable:
+    @njit(cache=True, fastmath=True)
+    def _reduce_bands(power, starts, ends, out):
+        # RMS per band över bin-intervallen [starts[i], ends[i])
+        for i in range(starts.size):
+            s = 0.0
+            for j in range(starts[i], ends[i]):
+                s += power[j]
+            out[i] = np.sqrt(s / max(1, ends[i] - starts[i]))
+
+
+# filändelser som spellistan accepterar
+SUPPORTED_EXTS = frozenset({'.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac'})
+
+
+def iter_audio_files(root):
+    """
+    Går igenom root rekursivt med os.scandir och ger bara ljudfiler (filtreras redan vid genomgången).
+    """
+    stack = [root]
+    while stack:
+        subdirs = []
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif (entry.is_file()
+                          and os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTS):
+                        yield entry.path
+        except OSError:
+            pass  # t.ex. saknad behörighet – hoppa över som os.walk
+        finally:
+            # som os.walk: underkataloger i listningsordning, även om listningen avbröts
+            stack.extend(reversed(subdirs))
 
 
 # ---------------- Equalizer UI ----------------
@@ -32,140 +95,492 @@ class EqualizerWidget(QWidget):
     def __init__(self, bands=20, parent=None):
         super().__init__(parent)
         self.bands = bands
-        self.levels = [10 for _ in range(bands)]
+        self.levels = np.full(bands, 10.0, dtype=np.float32)
         self.setMinimumHeight(100)
+        self._has_real_levels = False
+        self._rng = np.random.default_rng()
+        self._bar_color = QColor(124, 92, 255)  # lila – matchar ditt tema
+        self._bar_rects = []
+        self._bar_xs = []
+        self._bar_w = 2
+        self._paint_region = QRegion()  # staplarnas kolumner, bakgrunden runt om ritas inte om
         self._fallback_timer = QTimer(self)
         self._fallback_timer.timeout.connect(self._animate_fallback)
         self._fallback_timer.start(120)  # används bara om inga set_levels()-anrop kommer
 
     def set_levels(self, levels):
         # levels: iterable [0..1] per band
-        if not levels:
+        if levels is None or len(levels) == 0:
             return
+        # riktig ljuddata kommer -> fallback-animationen behövs inte längre
+        if not self._has_real_levels:
+            self._has_real_levels = True
+            self.stop_fallback()
         # mjuk smoothing
         if len(self.levels) != len(levels):
-            self.levels = [0]*len(levels)
+            self.levels = np.zeros(len(levels), dtype=np.float32)
+            self._layout_bars()
+            self.update()
         alpha = 0.4
-        for i, v in enumerate(levels):
-            v = float(max(0.0, min(1.0, v)))
-            self.levels[i] = (1 - alpha) * self.levels[i] + alpha * (v * 100.0)
-        self.update()
+        # levels += alpha * (v*100 - levels), allt på plats utan temporära arrayer
+        v = np.clip(np.asarray(levels, dtype=np.float32), 0.0, 1.0)
+        np.multiply(v, 100.0, out=v)
+        np.subtract(v, self.levels, out=v)
+        np.multiply(v, alpha, out=v)
+        np.add(self.levels, v, out=self.levels)
+        self.update(self._paint_region)
+
+    def stop_fallback(self):
+        self._fallback_timer.stop()
 
     def _animate_fallback(self):
         # om ingen ljuddata, gör en diskret animation så det inte är helt stilla
-        self.levels = [max(0, min(100, l + np.random.randint(-8, 8))) for l in self.levels]
-        self.update()
+        self.levels += self._rng.integers(-8, 8, size=len(self.levels))
+        np.clip(self.levels, 0, 100, out=self.levels)
+        self.update(self._paint_region)
+
+    def _layout_bars(self):
+        # staplarnas x/bredd ändras bara vid resize – höjden sätts i paintEvent
+        n = len(self.levels)
+        w = self.width() / max(1, n)
+        margin = max(2, int(w * 0.15))
+        self._bar_w = max(2, int(w - margin))
+        self._bar_xs = [int(i * w + margin / 2) for i in range(n)]
+        self._bar_rects = [QRect(x, 0, self._bar_w, 0) for x in self._bar_xs]
+        self._paint_region = QRegion()
+        for x in self._bar_xs:
+            self._paint_region += QRegion(x, 0, self._bar_w, self.height())
+
+    def resizeEvent(self, event):
+        self._layout_bars()
+        super().resizeEvent(event)
 
     def paintEvent(self, event):
-        painter = QPainter(self)
-        w = self.width() / max(1, len(self.levels))
         h = self.height()
-        margin = max(2, int(w * 0.15))
-        bar_w = max(2, int(w - margin))
-        for i, lvl in enumerate(self.levels):
-            bar_h = int((lvl / 100.0) * h)
-            x = int(i * w + margin / 2)
-            y = h - bar_h
-            color = QColor(124, 92, 255)      # lila – matchar ditt tema
-            painter.fillRect(x, y, bar_w, bar_h, color)
+        heights = (self.levels * (h / 100.0)).astype(np.int32)
+        bar_w = self._bar_w
+        # ett anrop per stapel (setRect) + ett drawRects för alla
+        for rect, x, bar_h in zip(self._bar_rects, self._bar_xs, heights.tolist()):
+            rect.setRect(x, h - bar_h, bar_w, bar_h)
+        painter = QPainter(self)
+        painter.setClipRegion(event.region())
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self._bar_color)
+        painter.drawRects(self._bar_rects)
 
 
 # ---------------- Audio Analyzer ----------------
 class AudioAnalyzer:
     """
-    Dekodar ljudfilen via pydub/ffmpeg till PCM (mono), och exponerar band-nivåer för given tid (ms).
+    Exponerar band-nivåer för given tid (ms).
+    Live-läge: PCM från spelaren matas in via feed() i en ringbuffert – ingen egen avkodning.
+    Annars: dekodar ljudfilen via ffmpeg till PCM (mono, s16le) i en temporär fil som mappas med np.memmap.
+    Bara fönstret som analyseras konverteras till float32.
     """
-    def __init__(self, bands=20):
+    def __init__(self, bands=20, live=False):
         self.bands = bands
+        self.live = live
         self.rate = None
-        self.samples = None  # numpy float32 mono [-1, 1]
+        self.samples = None  # PCM-heltal mono (memmap), skalas med self.scale till [-1, 1]
+        self.scale = 1.0
         self.window_ms = 100  # FFT-fönster (ms)
-        self._hann_cache = {}
+        self._tmp_path = None
+        self._current_path = None
+        # senast avkodade spår (path -> tillstånd) så att Prev/Next går direkt
+        self.cache_size = 3
+        self._cache = OrderedDict()
+        # förberäknat per fil (beror bara på rate/window_ms/bands)
+        self._bands_key = None
+        self.window_samples = None
+        self._hann_win = None
+        self._n_fft = None
+        self._band_starts = None
+        self._band_ends = None
+        self._band_idx = None
+        self._out = np.empty(bands, dtype=np.float32)
+        self._band_weight = np.linspace(1.2, 0.9, num=bands).astype(np.float32)
+        # ringbuffert för live-läget (float32 mono [-1, 1])
+        self.ring_seconds = 2
+        self._ring = None
+        self._ring_head = 0    # nästa skrivposition
+        self._ring_filled = 0
+        self._ring_end_ms = 0  # spårtid för senast inmatade sample
 
     def set_file(self, path: str):
-        self.samples = None
-        self.rate = None
-        if not PydubAvailable or not os.path.exists(path):
+        if self.live:
+            # nytt spår -> gammalt ljud i ringen gäller inte längre
+            self._ring_filled = 0
+            return
+        # samma spår (replay/seek) -> inget att göra
+        if path == self._current_path and self.samples is not None:
+            return
+        entry = self._cache.get(path)
+        if entry is not None:
+            self._cache.move_to_end(path)
+            self._restore(entry)
+            self._current_path = path
+            return
+        self._reset()
+        if not os.path.exists(path):
             return
         try:
-            seg = AudioSegment.from_file(path)  # kräver ffmpeg i systemet
-            # konvertera till mono för analys
-            if seg.channels > 1:
-                seg = seg.set_channels(1)
-            # håll vettig samplerate
-            if seg.frame_rate > 44100:
-                seg = seg.set_frame_rate(44100)
-            self.rate = seg.frame_rate
-            # till numpy float32
-            raw = np.array(seg.get_array_of_samples()).astype(np.float32)
-            # normera baserat på samplebred
-            peak = float(1 << (8*seg.sample_width - 1))
-            raw = raw / peak
-            self.samples = raw
+            if FfmpegPath:
+                self._decode_ffmpeg(path)
+            elif PydubAvailable:
+                self._decode_pydub(path)
+            else:
+                return
+            self._prepare_bands()
         except Exception:
-            self.samples = None
-            self.rate = None
+            self._remove_tmp(self._tmp_path)
+            self._reset()
+            return
+        self._current_path = path
+        self._cache[path] = self._snapshot()
+        while len(self._cache) > self.cache_size:
+            tmp_path = self._cache.popitem(last=False)[1][3]
+            self._remove_tmp(tmp_path)
+
+    def close(self):
+        # släpp mappningarna innan de temporära filerna tas bort
+        self._reset()
+        tmp_paths = [entry[3] for entry in self._cache.values()]
+        self._cache.clear()
+        for tmp_path in tmp_paths:
+            self._remove_tmp(tmp_path)
+
+    def _reset(self):
+        self.samples = None
+        self.rate = None
+        self._tmp_path = None
+        self._current_path = None
+
+    def _snapshot(self):
+        return (self.rate, self.samples, self.scale, self._tmp_path,
+                self.window_samples, self._hann_win, self._n_fft,
+                self._band_starts, self._band_ends, self._band_idx)
+
+    def _restore(self, entry):
+        (self.rate, self.samples, self.scale, self._tmp_path,
+         self.window_samples, self._hann_win, self._n_fft,
+         self._band_starts, self._band_ends, self._band_idx) = entry
+        self._bands_key = (self.rate, self.window_ms)
+
+    @staticmethod
+    def _remove_tmp(tmp_path):
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _decode_ffmpeg(self, path):
+        fd, self._tmp_path = tempfile.mkstemp(prefix="ccmamp_", suffix=".pcm")
+        os.close(fd)
+        subprocess.run(
+            [FfmpegPath, "-nostdin", "-v", "error", "-y", "-i", path,
+             "-f", "s16le", "-ac", "1", "-ar", "44100", self._tmp_path],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            check=True, creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        self.samples = np.memmap(self._tmp_path, dtype=np.int16, mode='r')
+        self.scale = 1.0 / 32768.0
+        self.rate = 44100
+
+    def _decode_pydub(self, path):
+        seg = AudioSegment.from_file(path)
+        # konvertera till mono för analys
+        if seg.channels > 1:
+            seg = seg.set_channels(1)
+        # håll vettig samplerate
+        if seg.frame_rate > 44100:
+            seg = seg.set_frame_rate(44100)
+        # nollkopierande vy över råbytesen (samma tolkning som get_array_of_samples)
+        dtype = {1: np.int8, 2: np.int16, 4: np.int32}.get(seg.sample_width)
+        if dtype is not None:
+            self.samples = np.frombuffer(seg.raw_data, dtype=dtype)
+        else:
+            self.samples = np.array(seg.get_array_of_samples())
+        # normera baserat på samplebred
+        self.scale = 1.0 / float(1 << (8*seg.sample_width - 1))
+        self.rate = seg.frame_rate
+
+    def _fft_size(self, n):
+        # nästa tvåpotens – kortare FFT ger för glesa bins och tomma basband
+        return int(2 ** np.ceil(np.log2(n)))
+
+    def _prepare_bands(self):
+        # FFT-storlek, bandkanter och bin-intervall beror bara på rate/window_ms –
+        # räkna inte om dem när nästa spår har samma samplerate
+        key = (self.rate, self.window_ms)
+        if key == self._bands_key:
+            return
+        self._bands_key = key
+        self.window_samples = int(self.window_ms * self.rate / 1000)
+        self._hann_win = np.hanning(self.window_samples).astype(np.float32)
+        self._n_fft = self._fft_size(self.window_samples)
+        freqs = np.fft.rfftfreq(self._n_fft, d=1.0/self.rate)
+        # Log-indelning av band (20 Hz – 20 kHz)
+        fmin, fmax = 20.0, min(20000.0, self.rate/2)
+        edges = np.geomspace(fmin, fmax, num=self.bands+1)
+        self._band_starts = np.searchsorted(freqs, edges[:-1], side='left')
+        self._band_ends = np.searchsorted(freqs, edges[1:], side='left')
+        # reduceat kräver index < len; tappar som mest sista binen i toppbandet
+        np.minimum(self._band_starts, len(freqs) - 1, out=self._band_starts)
+        np.minimum(self._band_ends, len(freqs) - 1, out=self._band_ends)
+        # [s0, e0, s1, e1, ...] -> reduceat ger bandsummor på jämna index
+        self._band_idx = np.stack([self._band_starts, self._band_ends], axis=1).ravel()
+
+    def disable_live(self):
+        # spelaren levererar ingen PCM för spåret -> filavkodning (ffmpeg/pydub)
+        self.live = False
+        self._ring = None
+        self._ring_filled = 0
+        self.rate = None
 
-    def _hann(self, n):
-        key = int(n)
-        if key not in self._hann_cache:
-            self._hann_cache[key] = np.hanning(key).astype(np.float32)
-        return self._hann_cache[key]
+    def enable_live(self):
+        # tillbaka till spelarens PCM – ringen allokeras om vid nästa feed()
+        self.live = True
+        self._ring = None
+        self._ring_filled = 0
 
-    def levels_at_ms(self, ms: int):
+    def feed(self, pcm, rate, start_ms):
         """
-        Returnerar en lista [0..1] per band för aktuell position.
+        Live-läge: lägg till float32 mono-PCM [-1, 1] som börjar vid start_ms i ringbufferten.
         """
-        if self.samples is None or self.rate is None:
+        if self._ring is None or rate != self.rate:
+            self.rate = rate
+            self._ring = np.zeros(int(self.ring_seconds * rate), dtype=np.float32)
+            self._ring_head = 0
+            self._ring_filled = 0
+            self._prepare_bands()
+        cap = len(self._ring)
+        self._ring_end_ms = start_ms + len(pcm) * 1000.0 / rate
+        pcm = pcm[-cap:]
+        n = len(pcm)
+        head = self._ring_head
+        if head + n <= cap:
+            self._ring[head: head + n] = pcm
+        else:
+            k = cap - head
+            self._ring[head:] = pcm[:k]
+            self._ring[:n - k] = pcm[k:]
+        self._ring_head = (head + n) % cap
+        self._ring_filled = min(cap, self._ring_filled + n)
+
+    def _ring_window(self, ms):
+        n_win = self.window_samples
+        if self._ring is None or self._ring_filled < n_win:
             return None
-        # hämta ett fönster runt tiden
-        half = int(self.window_ms / 2)
-        start_ms = max(0, ms - half)
-        end_ms = start_ms + self.window_ms
-        start_idx = int(start_ms * self.rate / 1000)
-        end_idx = int(end_ms * self.rate / 1000)
-        if start_idx >= len(self.samples):
+        cap = len(self._ring)
+        # hur många samples före skrivhuvudet fönstret slutar (centrerat kring ms)
+        behind = int((self._ring_end_ms - ms) * self.rate / 1000) - n_win // 2
+        behind = max(0, min(self._ring_filled - n_win, behind))
+        stop = (self._ring_head - behind) % cap
+        start = stop - n_win
+        if start >= 0:
+            return self._ring[start: stop].copy()
+        return np.concatenate((self._ring[start:], self._ring[:stop]))
+
+    def _file_window(self, ms):
+        if self.samples is None:
             return None
-        chunk = self.samples[start_idx: end_idx]
-        if len(chunk) < 16:
+        # hämta ett fönster (alltid window_samples långt) runt tiden
+        n_win = self.window_samples
+        n_total = len(self.samples)
+        idx_center = int(ms * self.rate / 1000)
+        if idx_center >= n_total or n_total < n_win:
             return None
+        start_idx = max(0, min(n_total - n_win, idx_center - n_win // 2))
+        # bara fönstret konverteras till float32 [-1, 1]
+        chunk = self.samples[start_idx: start_idx + n_win].astype(np.float32)
+        chunk *= self.scale
+        return chunk
 
+    def _fft_levels(self, chunk):
         # FFT
-        n = int(2 ** np.ceil(np.log2(len(chunk))))  # nästa tvåpotens
-        window = self._hann(len(chunk))
-        chunk_w = chunk[:len(window)] * window
-        spec = np.fft.rfft(chunk_w, n=n)
-        mag = np.abs(spec)  # magnitud
-        # frekvensaxel
-        freqs = np.fft.rfftfreq(n, d=1.0/self.rate)
+        chunk *= self._hann_win
+        if ScipyAvailable:
+            # float32 in -> complex64 ut (numpy räknar alltid i float64)
+            spec = rfft(chunk, n=self._n_fft, overwrite_x=True)
+        else:
+            spec = np.fft.rfft(chunk, n=self._n_fft)
+        # effekt (|X|^2) – ingen sqrt per bin
+        power = spec.real * spec.real + spec.imag * spec.imag
+
+        # RMS per band via förberäknade bin-intervall
+        if NumbaAvailable:
+            _reduce_bands(power, self._band_starts, self._band_ends, self._out)
+            return self._out
+        counts = self._band_ends - self._band_starts
+        sums = np.add.reduceat(power, self._band_idx)[::2]
+        return np.where(counts > 0, np.sqrt(sums / np.maximum(counts, 1)), 0.0)
 
-        # Log-indelning av band (20 Hz – 20 kHz)
-        fmin, fmax = 20.0, min(20000.0, self.rate/2)
-        edges = np.geomspace(fmin, fmax, num=self.bands+1)
-        levels = []
+    def levels_at_ms(self, ms: int):
+        """
+        Returnerar en float32-array [0..1] per band för aktuell position.
+        """
+        if self.rate is None:
+            return None
+        chunk = self._ring_window(ms) if self.live else self._file_window(ms)
+        if chunk is None:
+            return None
+        levels = self._fft_levels(chunk)
         eps = 1e-9
-        for i in range(self.bands):
-            lo, hi = edges[i], edges[i+1]
-            idx = np.where((freqs >= lo) & (freqs < hi))[0]
-            if idx.size == 0:
-                levels.append(0.0)
-            else:
-                val = float(np.sqrt(np.mean(mag[idx]**2)))  # RMS i bandet
-                levels.append(val)
-
-        # normalisera logg-ish
-        arr = np.array(levels, dtype=np.float32) + eps
-        arr = np.log10(arr)
+        # normalisera logg-ish (ny array – levels kan vara en återanvänd buffert)
+        arr = np.add(levels, eps, dtype=np.float32)
+        np.log10(arr, out=arr)
         # skala in i [0..1]
-        arr = (arr - arr.min()) / max(1e-6, (arr.max() - arr.min()))
+        arr -= arr.min()
+        arr /= max(1e-6, arr.max())
         # lite tonvikt på bas: multiplicera med fallande kurva
-        weight = np.linspace(1.2, 0.9, num=self.bands)
-        arr = np.clip(arr * weight, 0.0, 1.0)
-        return arr.tolist()
+        np.multiply(arr, self._band_weight, out=arr)
+        np.clip(arr, 0.0, 1.0, out=arr)
+        return arr
+
+
+# ---------------- Analys-tråd ----------------
+class AnalyzerWorker(QObject):
+    """
+    Kör AudioAnalyzer i en egen QThread så att avkodning och FFT inte blockerar GUI:t.
+    Positionen interpoleras mellan positionChanged-uppdateringarna från spelaren.
+    Kommer ingen live-PCM för ett spår efter att uppspelningen startat byts analysatorn till
+    filavkodning för det spåret; nästa spår (eller ny PCM) går tillbaka till live-läget.
+    """
+    levelsReady = Signal(object)  # np.ndarray [0..1] per band
+    # QAudioFormat.SampleFormat -> (dtype, nollpunkt, skala till [-1, 1])
+    _PCM_FORMATS = {
+        QAudioFormat.UInt8: (np.uint8, 128.0, 1.0 / 128.0),
+        QAudioFormat.Int16: (np.int16, 0.0, 1.0 / 32768.0),
+        QAudioFormat.Int32: (np.int32, 0.0, 1.0 / 2147483648.0),
+        QAudioFormat.Float: (np.float32, 0.0, 1.0),
+    }
+
+    def __init__(self, analyzer, interval_ms=50, live_timeout_ms=1500):
+        super().__init__()
+        self.analyzer = analyzer
+        self.interval_ms = interval_ms
+        self.live_timeout_ms = live_timeout_ms
+        self.eq_timer = None
+        self._live_capable = analyzer.live
+        self._live_watchdog = None
+        self._buffer_seen = False
+        self._path = None
+        self._pos_ms = 0
+        self._playing = False
+        self._clock = QElapsedTimer()
+
+    @Slot()
+    def start(self):
+        # timern måste skapas i trådens egen kontext
+        self.eq_timer = QTimer(self)
+        self.eq_timer.setInterval(self.interval_ms)
+        self.eq_timer.timeout.connect(self._update_levels)
+        if self._live_capable:
+            self._live_watchdog = QTimer(self)
+            self._live_watchdog.setSingleShot(True)
+            self._live_watchdog.setInterval(self.live_timeout_ms)
+            self._live_watchdog.timeout.connect(self._check_live_feed)
+        if self._playing:
+            self.set_playing(True)
+
+    @Slot(str)
+    def set_file(self, path):
+        self._path = path
+        # reservläget gäller bara spåret där ingen PCM kom – försök live igen
+        self._buffer_seen = False
+        if self._live_capable and not self.analyzer.live:
+            self.analyzer.enable_live()
+        self.analyzer.set_file(path)
+        self._pos_ms = 0
+        self._clock.restart()
+        if self._live_watchdog is not None and self._playing:
+            self._live_watchdog.start()
+
+    @Slot(QAudioBuffer)
+    def feed_buffer(self, buf):
+        # live-PCM från spelaren -> float32 mono till analysatorns ringbuffert
+        if not self._live_capable:
+            return
+        self._buffer_seen = True
+        if not self.analyzer.live:
+            # PCM kom ändå (sen backend) -> sluta avkoda filen själv
+            self.analyzer.enable_live()
+        fmt = buf.format()
+        dtype, offset, scale = self._PCM_FORMATS.get(fmt.sampleFormat(), (None, 0, 0))
+        if dtype is None or buf.sampleCount() <= 0:
+            return
+        pcm = np.frombuffer(buf.constData(), dtype=dtype, count=buf.sampleCount())
+        channels = max(1, fmt.channelCount())
+        pcm = pcm.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+        if offset or scale != 1.0:
+            pcm = (pcm - offset) * scale
+        self.analyzer.feed(pcm, fmt.sampleRate(), buf.startTime() / 1000.0)
+
+    @Slot(int)
+    def set_position(self, ms):
+        self._pos_ms = ms
+        self._clock.restart()
+
+    @Slot(bool)
+    def set_playing(self, playing):
+        self._playing = playing
+        self._clock.restart()
+        # timern går bara under uppspelning – inga onödiga väckningar i viloläge
+        if self.eq_timer is not None:
+            if playing:
+                self.eq_timer.start()
+            else:
+                self.eq_timer.stop()
+        if self._live_watchdog is not None:
+            if playing and self.analyzer.live and not self._buffer_seen:
+                self._live_watchdog.start()
+            else:
+                self._live_watchdog.stop()
+
+    def _check_live_feed(self):
+        # backend som aldrig skickar audioBufferReceived -> avkoda filen själv
+        if self._buffer_seen or not self.analyzer.live:
+            return
+        self.analyzer.disable_live()
+        if self._path:
+            self.analyzer.set_file(self._path)
+
+    def _update_levels(self):
+        pos_ms = self._pos_ms + self._clock.elapsed()
+        levels = self.analyzer.levels_at_ms(pos_ms)
+        if levels is not None:
+            self.levelsReady.emit(levels)
+
+
+# ---------------- Längd-probe i bakgrunden ----------------
+class ProbeSignals(QObject):
+    finished = Signal(int, object)  # (job_id, dur_ms eller None)
+
+
+class ProbeJob(QRunnable):
+    """
+    Läser längden för en fil i QThreadPool så att stora importer inte låser GUI:t.
+    Resultatet skickas tillbaka via ProbeSignals.finished (köat till GUI-tråden).
+    """
+    def __init__(self, job_id, path, probe, signals):
+        super().__init__()
+        self.job_id = job_id
+        self.path = path
+        self.probe = probe
+        self.signals = signals
+
+    def run(self):
+        self.signals.finished.emit(self.job_id, self.probe(self.path))
 
 
 # ---------------- Huvud-appen ----------------
 class MiniAmp(QWidget):
+    # till analys-tråden (köade anrop)
+    analyzerFileRequested = Signal(str)
+    analyzerPositionChanged = Signal(int)
+    analyzerPlayingChanged = Signal(bool)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("MiniAmp – Playlists")
@@ -181,9 +596,17 @@ class MiniAmp(QWidget):
         self.current_index = -1
         self.repeat = False
         self.shuffle = False
+        self._last_second_shown = -1
+        self._slider_held = False
 
         # --- Analyzer / EQ ---
-        self.analyzer = AudioAnalyzer(bands=20)
+        self.analyzer = AudioAnalyzer(bands=20, live=QAudioBufferOutput is not None)
+
+        # --- Längd-probe (job_id -> QPersistentModelIndex, överlever flytt/borttag) ---
+        self._probe_signals = ProbeSignals()
+        self._probe_signals.finished.connect(self.on_probe_finished, Qt.QueuedConnection)
+        self._probe_pending = {}
+        self._probe_ids = itertools.count()
 
         # --- THEME ---
         self.apply_theme()
@@ -338,11 +761,26 @@ class MiniAmp(QWidget):
         self.equalizer = EqualizerWidget(bands=self.analyzer.bands)
         v.addWidget(self.equalizer)
 
-        # uppdaterings-timer för EQ (synkad mot player.position)
-        self.eq_timer = QTimer(self)
-        self.eq_timer.setInterval(50)
-        self.eq_timer.timeout.connect(self._update_equalizer)
-        self.eq_timer.start()
+        # analys + EQ-timer i egen tråd (synkad mot player.position)
+        self._analyzer_thread = QThread(self)
+        self._analyzer_worker = AnalyzerWorker(self.analyzer, interval_ms=50)
+        self._analyzer_worker.moveToThread(self._analyzer_thread)
+        self._analyzer_thread.started.connect(self._analyzer_worker.start)
+        self._analyzer_thread.finished.connect(self._analyzer_worker.deleteLater)
+        self.analyzerFileRequested.connect(self._analyzer_worker.set_file)
+        self.analyzerPositionChanged.connect(self._analyzer_worker.set_position)
+        self.analyzerPlayingChanged.connect(self._analyzer_worker.set_playing)
+        self._analyzer_worker.levelsReady.connect(self.equalizer.set_levels, Qt.QueuedConnection)
+        if QAudioBufferOutput is not None:
+            # tappa spelarens egen PCM i stället för att avkoda filen en gång till
+            fmt = QAudioFormat()
+            fmt.setSampleRate(44100)
+            fmt.setChannelCount(1)
+            fmt.setSampleFormat(QAudioFormat.Float)
+            self._buffer_output = QAudioBufferOutput(fmt, self)
+            self.player.setAudioBufferOutput(self._buffer_output)
+            self._buffer_output.audioBufferReceived.connect(self._analyzer_worker.feed_buffer)
+        self._analyzer_thread.start()
 
         # Separator
         sep = QFrame(); sep.setFrameShape(QFrame.HLine); sep.setObjectName("Separator")
@@ -371,7 +809,10 @@ class MiniAmp(QWidget):
         self.player.durationChanged.connect(self.on_duration_changed)
         self.player.mediaStatusChanged.connect(self.on_media_status_changed)
         self.player.errorOccurred.connect(self.on_error)
+        self.player.playbackStateChanged.connect(self.on_playback_state_changed)
         self.pos_slider.sliderMoved.connect(self.on_seek)
+        self.pos_slider.sliderPressed.connect(lambda: setattr(self, '_slider_held', True))
+        self.pos_slider.sliderReleased.connect(lambda: setattr(self, '_slider_held', False))
 
         # kortkommandon
         QAction("Play/Pause", self, shortcut=QKeySequence("Space"), triggered=self.toggle_play_pause)
@@ -433,13 +874,20 @@ class MiniAmp(QWidget):
         )
 
     # --- EQ uppdatering ---
-    def _update_equalizer(self):
-        if self.player.playbackState() != QMediaPlayer.PlayingState:
-            return
-        pos_ms = self.player.position()
-        levels = self.analyzer.levels_at_ms(pos_ms)
-        if levels is not None:
-            self.equalizer.set_levels(levels)
+    def on_playback_state_changed(self, state):
+        # fallback-animationen stoppas först när riktiga nivåer kommer (set_levels)
+        self.analyzerPlayingChanged.emit(state == QMediaPlayer.PlayingState)
+
+    def closeEvent(self, event):
+        # släng köade längd-probes och vänta in de som redan körs
+        pool = QThreadPool.globalInstance()
+        pool.clear()
+        pool.waitForDone()
+        self._probe_pending.clear()
+        self._analyzer_thread.quit()
+        self._analyzer_thread.wait()
+        self.analyzer.close()
+        super().closeEvent(event)
 
     # --- Drag & drop från OS till listan/fönstret ---
     def dragEnterEvent(self, event):
@@ -454,26 +902,58 @@ class MiniAmp(QWidget):
 
     # --- Playlist-hjälpare ---
     def add_files(self, paths):
-        supported = {'.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac'}
         new_items = []
-        for p in paths:
-            if not p:
-                continue
-            ext = Path(p).suffix.lower()
-            if ext in supported and Path(p).exists():
-                dur_ms = self.probe_duration_ms(p)
-                name = Path(p).stem
-                text = f"{name} — {self.fmt_duration(dur_ms)}" if dur_ms else name
-                item = QListWidgetItem(text)
-                item.setData(Qt.UserRole, str(Path(p).resolve()))
-                if dur_ms is not None:
-                    item.setData(Qt.UserRole + 1, dur_ms)
-                self.playlist.addItem(item)
-                new_items.append(item)
+        self._begin_bulk_insert()
+        try:
+            for p in paths:
+                if not p:
+                    continue
+                # os.path i stället för pathlib – märkbart snabbare för stora importer
+                ext = os.path.splitext(p)[1].lower()
+                if ext in SUPPORTED_EXTS and os.path.exists(p):
+                    item = self._add_playlist_item(p, None)
+                    new_items.append(item)
+        finally:
+            self._end_bulk_insert()
         if new_items and self.current_index == -1:
             self.current_index = self.playlist.row(new_items[0])
             self.play_item(self.current_index)
 
+    def _begin_bulk_insert(self):
+        # ingen omritning/signaler per rad vid stora importer – en gång i slutet räcker
+        self.playlist.setUpdatesEnabled(False)
+        self.playlist.blockSignals(True)
+
+    def _end_bulk_insert(self):
+        self.playlist.blockSignals(False)
+        self.playlist.setUpdatesEnabled(True)
+
+    def _add_playlist_item(self, p, dur_ms):
+        # lägg till direkt; saknas längd läses den i bakgrunden
+        item = QListWidgetItem()
+        item.setData(Qt.UserRole, os.path.abspath(p))
+        self._set_item_duration(item, dur_ms)
+        self.playlist.addItem(item)
+        if dur_ms is None and MutagenFile is not None:
+            job_id = next(self._probe_ids)
+            self._probe_pending[job_id] = QPersistentModelIndex(self.playlist.indexFromItem(item))
+            QThreadPool.globalInstance().start(
+                ProbeJob(job_id, p, self.probe_duration_ms, self._probe_signals))
+        return item
+
+    def _set_item_duration(self, item, dur_ms):
+        name = os.path.splitext(os.path.basename(item.data(Qt.UserRole)))[0]
+        item.setText(f"{name} — {self.fmt_duration(dur_ms)}" if dur_ms else name)
+        if dur_ms is not None:
+            item.setData(Qt.UserRole + 1, dur_ms)
+
+    @Slot(int, object)
+    def on_probe_finished(self, job_id, dur_ms):
+        index = self._probe_pending.pop(job_id, None)
+        if index is None or not index.isValid() or dur_ms is None:
+            return
+        self._set_item_duration(self.playlist.item(index.row()), dur_ms)
+
     @Slot()
     def open_files(self):
         files, _ = QFileDialog.getOpenFileNames(
@@ -488,11 +968,7 @@ class MiniAmp(QWidget):
     def add_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Välj mapp med ljudfiler")
         if folder:
-            all_files = []
-            for root, _, files in os.walk(folder):
-                for f in files:
-                    all_files.append(os.path.join(root, f))
-            self.add_files(all_files)
+            self.add_files(list(iter_audio_files(folder)))
 
     def remove_selected(self):
         row = self.playlist.currentRow()
@@ -513,6 +989,7 @@ class MiniAmp(QWidget):
 
     def clear_playlist(self):
         self.playlist.clear()
+        self._probe_pending.clear()
         self.current_index = -1
         self.player.stop()
         self.lbl_file.setText("Ingen fil vald")
@@ -533,8 +1010,8 @@ class MiniAmp(QWidget):
         self.lbl_file.setText(Path(path).stem)
         self.player.play()
         self.playlist.setCurrentRow(row)
-        # ladda analysdata för equalizern
-        self.analyzer.set_file(path)
+        # ladda analysdata för equalizern (i analys-tråden)
+        self.analyzerFileRequested.emit(path)
 
     def next_track(self):
         n = self.playlist.count()
@@ -571,8 +1048,15 @@ class MiniAmp(QWidget):
 
     @Slot(int)
     def on_position_changed(self, pos):
-        self.pos_slider.setValue(pos)
-        self.update_time_label()
+        self.analyzerPositionChanged.emit(pos)
+        # låt användaren dra i reglaget utan att positionen hoppar tillbaka
+        if not self._slider_held:
+            self.pos_slider.setValue(pos)
+        # etiketten visar hela sekunder – räkna som fmt_duration ("--:--" vid 0) och uppdatera bara vid byte
+        cur_s = int(round(pos/1000)) if pos > 0 else -1
+        if cur_s != self._last_second_shown:
+            self._last_second_shown = cur_s
+            self.update_time_label()
 
     @Slot(int)
     def on_duration_changed(self, dur):
@@ -636,7 +1120,7 @@ class MiniAmp(QWidget):
                     if dur_ms is None:
                         dur_ms = self.probe_duration_ms(file_path)
                     dur_s = int(round(dur_ms/1000)) if dur_ms else -1
-                    title = Path(file_path).stem
+                    title = os.path.splitext(os.path.basename(file_path))[0]
                     f.write(f"#EXTINF:{dur_s},{title}\n")
                     f.write(file_path + "\n")
         except Exception as e:
@@ -647,35 +1131,32 @@ class MiniAmp(QWidget):
         if not path:
             return
         try:
-            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                pending_duration = None
-                for raw in f:
-                    line = raw.strip()
-                    if not line:
-                        continue
-                    if line.startswith('#EXTINF:'):
-                        try:
-                            rest = line[8:]  # "<seconds>,<title>"
-                            dur_part, _sep, _title = rest.partition(',')
-                            pending_duration = int(float(dur_part)) * 1000 if dur_part else None
-                        except Exception:
-                            pending_duration = None
-                        continue
-                    if line.startswith('#'):
-                        continue
-                    p = line
-                    if not os.path.isabs(p):
-                        p = os.path.abspath(os.path.join(os.path.dirname(path), p))
-                    if os.path.exists(p):
-                        dur_ms = pending_duration if pending_duration else self.probe_duration_ms(p)
-                        name = Path(p).stem
-                        text = f"{name} — {self.fmt_duration(dur_ms)}" if dur_ms else name
-                        item = QListWidgetItem(text)
-                        item.setData(Qt.UserRole, str(Path(p).resolve()))
-                        if dur_ms is not None:
-                            item.setData(Qt.UserRole + 1, dur_ms)
-                        self.playlist.addItem(item)
+            self._begin_bulk_insert()
+            try:
+                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
                     pending_duration = None
+                    for raw in f:
+                        line = raw.strip()
+                        if not line:
+                            continue
+                        if line.startswith('#EXTINF:'):
+                            try:
+                                rest = line[8:]  # "<seconds>,<title>"
+                                dur_part, _sep, _title = rest.partition(',')
+                                pending_duration = int(float(dur_part)) * 1000 if dur_part else None
+                            except Exception:
+                                pending_duration = None
+                            continue
+                        if line.startswith('#'):
+                            continue
+                        p = line
+                        if not os.path.isabs(p):
+                            p = os.path.abspath(os.path.join(os.path.dirname(path), p))
+                        if os.path.exists(p):
+                            self._add_playlist_item(p, pending_duration or None)
+                        pending_duration = None
+            finally:
+                self._end_bulk_insert()
         except Exception as e:
             QMessageBox.critical(self, "Öppna misslyckades", str(e))
 